@@ -1,9 +1,83 @@
 import PyPDF2
+import ahocorasick
+import pypdfium2 as pdfium
 import json
 import spacy
+from spacy.language import Language
+from spacy.tokens import Doc
 from pathlib import Path
 from typing import List, Dict, Optional
+from collections import defaultdict
+import functools
 import logging
+import os
+import re
+import tempfile
+
+try:
+    import orjson
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:
+    # Fall back to the stdlib encoder when orjson is not installed
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+
+# Pipeline components not needed for sentence segmentation
+UNUSED_PIPES = ("tagger", "attribute_ruler", "lemmatizer", "ner")
+
+# Characters that end a sentence for the rule-based sentencizer. Semicolons are
+# deliberately excluded: they separate items in clinical lists, and splitting on
+# them would let the short-sentence filter in _process_doc drop those items
+SENTENCE_PUNCT = [".", "!", "?"]
+
+# Sentence-ending marks that follow a word and precede whitespace or the end of
+# text, so decimals, dotted abbreviations and dot leaders are not counted
+SENTENCE_END_PATTERN = re.compile(
+    r'(?<![\s{0}])[{0}](?=\s|$)'.format(re.escape(''.join(SENTENCE_PUNCT))))
+
+# Pages averaging more words than this per sentence-ending mark are treated
+# as irregular (tables, lists, captions) and need the dependency parser
+IRREGULAR_WORDS_PER_SENTENCE = 60
+
+# Share of irregular pages above which a whole document falls back to the parser
+IRREGULAR_PAGE_RATIO = 0.2
+
+# Read buffer for the PyPDF2 fallback path
+PDF_READ_BUFFER_SIZE = 1 << 20
+
+# Bits for the keyword groups found in a chunk; species bits follow these
+SYMPTOMS_BIT = 1 << 0
+TREATMENT_BIT = 1 << 1
+PREVENTION_BIT = 1 << 2
+
+# Keyword groups that produce Q&A pairs; chunks without any are discarded
+QA_MASK = SYMPTOMS_BIT | TREATMENT_BIT | PREVENTION_BIT
+
+# Keyword groups that raise extraction confidence
+CONFIDENCE_MASK = SYMPTOMS_BIT | TREATMENT_BIT
+
+@functools.lru_cache(maxsize=None)
+def _load_nlp(model_name: str, use_parser: bool) -> Language:
+    """
+    Load a spaCy pipeline for sentence segmentation, once per configuration.
+    
+    Args:
+        model_name: Name of the spaCy model to load when using the parser
+        use_parser: Use the model's dependency parser instead of the sentencizer
+        
+    Returns:
+        Loaded spaCy pipeline
+    """
+    # Only sentence boundaries are needed, so skip tagging, lemmas and NER
+    if use_parser:
+        return spacy.load(model_name, disable=list(UNUSED_PIPES))
+        
+    # Rule-based splitting on punctuation is enough for regular textbook prose
+    nlp = spacy.blank("en")
+    nlp.add_pipe("sentencizer", config={"punct_chars": SENTENCE_PUNCT})
+    return nlp
 
 class VetDataExtractor:
     """
@@ -11,15 +85,30 @@ class VetDataExtractor:
     Converts textbook content into structured Q&A format suitable for chatbot training.
     """
     
-    def __init__(self, model_name: str = "en_core_web_sm"):
+    def __init__(self, model_name: str = "en_core_web_sm",
+                 batch_size: int = 32, n_process: int = 1,
+                 use_fast_sentencizer: bool = True, parallel_threshold: int = 50):
         """
         Initialize the extractor with spaCy model and configure logging.
         
         Args:
             model_name: Name of the spaCy model to use for text processing
+            batch_size: Number of pages passed to spaCy per minibatch
+            n_process: Number of processes spaCy uses when parsing pages (-1 uses
+                all cores). Keep at 1 on Windows/Jupyter or without a __main__ guard
+            use_fast_sentencizer: Split sentences with the rule-based sentencizer,
+                falling back to the dependency parser only for text with irregular
+                formatting. When False the parser is always used
+            parallel_threshold: Minimum number of pages before worker processes are
+                used; smaller documents are parsed in-process to avoid IPC overhead
         """
-        # Initialize spaCy with more comprehensive model
-        self.nlp = spacy.load(model_name)
+        # Pipelines are cached per configuration and shared across instances
+        self.model_name = model_name
+        self.use_fast_sentencizer = use_fast_sentencizer
+        self.nlp = _load_nlp(model_name, not use_fast_sentencizer)
+        self.batch_size = batch_size
+        self.n_process = n_process
+        self.parallel_threshold = parallel_threshold
         
         # Configure logging
         logging.basicConfig(
@@ -29,25 +118,35 @@ class VetDataExtractor:
         self.logger = logging.getLogger(__name__)
         
         # Define common veterinary terms for better content recognition
-        self.symptoms_keywords = {
+        self.symptoms_keywords = frozenset({
             'symptom', 'sign', 'clinical presentation', 'manifestation',
             'indication', 'presenting complaint'
-        }
+        })
         
-        self.treatment_keywords = {
+        self.treatment_keywords = frozenset({
             'treat', 'treatment', 'manage', 'therapy', 'intervention',
             'prescription', 'medication', 'remedy'
-        }
+        })
+        
+        self.prevention_keywords = frozenset({'prevent', 'prevention'})
         
         self.species_mapping = {
-            'dog': ['canine', 'puppy', 'dog'],
-            'cat': ['feline', 'kitten', 'cat'],
-            'bird': ['avian', 'parrot', 'parakeet'],
-            'rabbit': ['bunny', 'rabbit', 'hare'],
-            'hamster': ['hamster', 'gerbil', 'rodent']
+            'dog': frozenset({'canine', 'puppy', 'dog'}),
+            'cat': frozenset({'feline', 'kitten', 'cat'}),
+            'bird': frozenset({'avian', 'parrot', 'parakeet'}),
+            'rabbit': frozenset({'bunny', 'rabbit', 'hare'}),
+            'hamster': frozenset({'hamster', 'gerbil', 'rodent'})
         }
+        
+        # Metadata tag reported for each matched group bit
+        self.tag_bits = {'symptoms': SYMPTOMS_BIT, 'treatment': TREATMENT_BIT}
+        for index, species in enumerate(self.species_mapping):
+            self.tag_bits[species] = 1 << (3 + index)
+        
+        # Match all keyword groups in one pass over each chunk
+        self.keyword_automaton = self._build_keyword_automaton()
 
-    def process_pdf(self, pdf_path: str, output_path: str) -> List[Dict]:
+    def process_pdf(self, pdf_path: str, output_path: str) -> int:
         """
         Process a veterinary PDF document and extract structured information.
         
@@ -56,44 +155,158 @@ class VetDataExtractor:
             output_path: Path where processed JSON should be saved
         
         Returns:
-            List of processed data chunks
+            Number of processed data chunks written to output_path
         """
         self.logger.info(f"Starting to process PDF: {pdf_path}")
         
         try:
-            with open(pdf_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                processed_data = []
-                
-                for page_num, page in enumerate(reader.pages, 1):
-                    self.logger.info(f"Processing page {page_num}/{len(reader.pages)}")
-                    text = page.extract_text()
+            page_texts = []
+            
+            for page_num, text in enumerate(self._extract_page_texts(pdf_path), 1):
+                # Skip pages with minimal content
+                if len(text.strip()) < 100:
+                    self.logger.warning(f"Page {page_num} contains minimal text, skipping")
+                    continue
                     
-                    # Skip pages with minimal content
-                    if len(text.strip()) < 100:
-                        self.logger.warning(f"Page {page_num} contains minimal text, skipping")
-                        continue
-                        
-                    processed_chunks = self.process_text(text)
-                    processed_data.extend(processed_chunks)
+                page_texts.append(text)
                     
-            # Save processed data
             output_path = Path(output_path)
             output_path.parent.mkdir(parents=True, exist_ok=True)
             
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(processed_data, f, indent=4, ensure_ascii=False)
+            # Only fan out to worker processes when there are enough pages
+            # to outweigh the cost of shipping docs between processes
+            n_process = self.n_process if len(page_texts) > self.parallel_threshold else 1
+            
+            nlp = self._select_nlp(page_texts)
+            
+            # Parse all pages in one batched pass and stream chunks to disk
+            # as they are produced instead of holding them all in memory. The
+            # temporary file only replaces output_path once the array is closed,
+            # so a failure part-way never leaves a truncated output
+            chunk_count = 0
+            tmp_file = tempfile.NamedTemporaryFile(dir=output_path.parent, prefix=output_path.name,
+                                                   suffix='.tmp', delete=False)
+            tmp_path = Path(tmp_file.name)
+            try:
+                with tmp_file as f:
+                    f.write(b'[\n')
+                    for doc in nlp.pipe(page_texts, batch_size=self.batch_size,
+                                        n_process=n_process):
+                        for chunk in self._process_doc(doc):
+                            if chunk_count:
+                                f.write(b',\n')
+                            f.write(_dumps(chunk))
+                            chunk_count += 1
+                    f.write(b'\n]\n')
+                os.replace(tmp_path, output_path)
+            finally:
+                tmp_path.unlink(missing_ok=True)
                 
-            self.logger.info(f"Successfully processed {len(processed_data)} chunks")
-            return processed_data
+            self.logger.info(f"Successfully processed {chunk_count} chunks")
+            return chunk_count
             
         except Exception as e:
             self.logger.error(f"Error processing PDF: {str(e)}")
             raise
 
+    def _extract_page_texts(self, pdf_path: str) -> List[str]:
+        """
+        Extract the text of every page, preferring PDFium over PyPDF2.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            
+        Returns:
+            List of page texts in document order
+        """
+        try:
+            pdf = pdfium.PdfDocument(pdf_path)
+        except Exception as e:
+            # Encrypted or malformed files PDFium refuses to open
+            self.logger.warning(f"PDFium could not open PDF ({str(e)}), falling back to PyPDF2")
+            return self._extract_page_texts_pypdf2(pdf_path)
+            
+        page_texts = []
+        failed_pages = []
+        try:
+            total_pages = len(pdf)
+            for page_index in range(total_pages):
+                self.logger.info(f"Processing page {page_index + 1}/{total_pages}")
+                page = textpage = None
+                try:
+                    page = pdf[page_index]
+                    textpage = page.get_textpage()
+                    page_texts.append(textpage.get_text_range())
+                except Exception as e:
+                    self.logger.warning(f"PDFium failed on page {page_index + 1} ({str(e)}), "
+                                        f"retrying with PyPDF2")
+                    page_texts.append('')
+                    failed_pages.append(page_index)
+                finally:
+                    if textpage is not None:
+                        textpage.close()
+                    if page is not None:
+                        page.close()
+        finally:
+            pdf.close()
+            
+        if failed_pages:
+            self._fill_pages_pypdf2(pdf_path, page_texts, failed_pages)
+            
+        return page_texts
+
+    def _fill_pages_pypdf2(self, pdf_path: str, page_texts: List[str],
+                           page_indexes: List[int]) -> None:
+        """
+        Re-extract individual pages PDFium could not read using PyPDF2.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            page_texts: Page texts to update in place
+            page_indexes: Zero-based indexes of the pages to re-extract
+        """
+        try:
+            with open(pdf_path, 'rb', buffering=PDF_READ_BUFFER_SIZE) as file:
+                pages = PyPDF2.PdfReader(file).pages
+                
+                for page_index in page_indexes:
+                    try:
+                        page_texts[page_index] = pages[page_index].extract_text() or ''
+                    except Exception as e:
+                        # Left empty, so the page is skipped as minimal content
+                        self.logger.warning(f"PyPDF2 failed on page {page_index + 1} "
+                                            f"({str(e)}), skipping it")
+        except Exception as e:
+            self.logger.warning(f"PyPDF2 could not open PDF ({str(e)}), "
+                                f"skipping {len(page_indexes)} unreadable pages")
+
+    def _extract_page_texts_pypdf2(self, pdf_path: str) -> List[str]:
+        """
+        Extract the text of every page using PyPDF2.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            
+        Returns:
+            List of page texts in document order
+        """
+        page_texts = []
+        
+        # A large read buffer keeps PyPDF2's many small reads off the disk
+        with open(pdf_path, 'rb', buffering=PDF_READ_BUFFER_SIZE) as file:
+            reader = PyPDF2.PdfReader(file)
+            pages = reader.pages
+            total_pages = len(pages)
+            
+            for page_num, page in enumerate(pages, 1):
+                self.logger.info(f"Processing page {page_num}/{total_pages}")
+                page_texts.append(page.extract_text() or '')
+                
+        return page_texts
+
     def process_text(self, text: str) -> List[Dict]:
         """
-        Process text into meaningful chunks for Q&A generation.
+        Process raw text into meaningful chunks for Q&A generation.
         
         Args:
             text: Raw text extracted from PDF
@@ -101,23 +314,81 @@ class VetDataExtractor:
         Returns:
             List of processed chunks with Q&A pairs
         """
-        doc = self.nlp(text)
+        return self._process_doc(self._select_nlp([text])(text))
+
+    def _select_nlp(self, texts: List[str]) -> Language:
+        """
+        Choose the sentencizer or parser pipeline for a batch of texts.
+        
+        Args:
+            texts: Page texts that will be processed together
+            
+        Returns:
+            spaCy pipeline to process the texts with
+        """
+        if not self.use_fast_sentencizer or not texts:
+            return self.nlp
+            
+        irregular = sum(1 for text in texts if self._is_irregular(text))
+        if irregular / len(texts) > IRREGULAR_PAGE_RATIO:
+            self.logger.info(f"{irregular}/{len(texts)} pages have irregular formatting, "
+                             f"using the dependency parser")
+            try:
+                return _load_nlp(self.model_name, True)
+            except OSError as e:
+                # The parser model is optional with the sentencizer default
+                self.logger.warning(f"Could not load parser model '{self.model_name}' "
+                                    f"({str(e)}), keeping the sentencizer")
+            
+        return self.nlp
+
+    def _is_irregular(self, text: str) -> bool:
+        """
+        Heuristically detect text whose punctuation does not mark sentences.
+        
+        Args:
+            text: Page text
+            
+        Returns:
+            Boolean indicating if the rule-based sentencizer is likely to fail
+        """
+        word_count = len(text.split())
+        punct_count = sum(1 for _ in SENTENCE_END_PATTERN.finditer(text))
+        
+        return word_count > IRREGULAR_WORDS_PER_SENTENCE * max(punct_count, 1)
+
+    def _process_doc(self, doc: Doc) -> List[Dict]:
+        """
+        Split an already parsed spaCy document into chunks for Q&A generation.
+        
+        Args:
+            doc: spaCy document for a single page
+            
+        Returns:
+            List of processed chunks with Q&A pairs
+        """
         chunks = []
         current_chunk = []
+        # Length of ' '.join(current_chunk), tracked without joining
+        char_count = -1
         
         for sent in doc.sents:
+            sent_text = sent.text
+            
             # Skip sentences that are too short or contain only numbers/special characters
-            if len(sent.text.strip()) < 10 or not any(c.isalpha() for c in sent.text):
+            if len(sent_text.strip()) < 10 or not any(c.isalpha() for c in sent_text):
                 continue
                 
-            current_chunk.append(sent.text)
+            current_chunk.append(sent_text)
+            char_count += len(sent_text) + 1
             
             # Create a new chunk after collecting related sentences
-            if self._is_chunk_complete(current_chunk):
+            if self._is_chunk_complete(char_count, sent_text):
                 processed_chunk = self.create_qa_pair(current_chunk)
                 if processed_chunk:
                     chunks.append(processed_chunk)
                 current_chunk = []
+                char_count = -1
         
         return chunks
 
@@ -131,58 +402,115 @@ class VetDataExtractor:
         Returns:
             Dictionary containing source text, Q&A pairs, and metadata
         """
-        text = ' '.join(sentences)
-        
-        # Skip if text is too short or doesn't contain meaningful content
-        if len(text) < 50:
+        # Skip if text is too short, measured without joining the sentences
+        if sum(len(sentence) for sentence in sentences) + len(sentences) - 1 < 50:
             return None
             
-        qa_pairs = self.generate_qa(text)
-        if not qa_pairs:
+        # Scan each sentence for keywords before building anything, and drop
+        # chunks that would not produce a single Q&A pair
+        mask = 0
+        for sentence in sentences:
+            mask |= self._scan_keywords(sentence.lower())
+        if not mask & QA_MASK:
             return None
             
+        text = ' '.join(sentences)
+        
+        # Character offsets of each sentence within the joined text, so
+        # downstream consumers can slice sentences without re-splitting
+        sent_spans = []
+        start = 0
+        for sentence in sentences:
+            sent_spans.append([start, start + len(sentence)])
+            start += len(sentence) + 1
+        
+        qa_pairs = self.generate_qa(text, mask)
+            
         data = {
             "source_text": text,
             "qa_pairs": qa_pairs,
             "metadata": {
-                "tags": self.extract_tags(text),
-                "context": self.determine_context(text),
+                "tags": self.extract_tags(text, mask),
+                "context": self.determine_context(text, mask),
                 "source_type": "textbook",
-                "confidence": self._calculate_confidence(text)
+                "confidence": self._calculate_confidence(text, mask),
+                "sent_spans": sent_spans
             }
         }
         
         return data
 
-    def generate_qa(self, text: str) -> List[Dict]:
+    def _build_keyword_automaton(self) -> ahocorasick.Automaton:
+        """
+        Compile every keyword group into one Aho-Corasick automaton.
+        
+        Returns:
+            Automaton mapping each keyword to the bits of the groups it signals
+        """
+        keyword_bits = defaultdict(int)
+        
+        for keyword in self.symptoms_keywords:
+            keyword_bits[keyword] |= SYMPTOMS_BIT
+        for keyword in self.treatment_keywords:
+            keyword_bits[keyword] |= TREATMENT_BIT
+        for keyword in self.prevention_keywords:
+            keyword_bits[keyword] |= PREVENTION_BIT
+        for species, keywords in self.species_mapping.items():
+            for keyword in keywords:
+                keyword_bits[keyword] |= self.tag_bits[species]
+                
+        automaton = ahocorasick.Automaton()
+        for keyword, bits in keyword_bits.items():
+            automaton.add_word(keyword, bits)
+        automaton.make_automaton()
+        
+        return automaton
+
+    def _scan_keywords(self, text_lower: str) -> int:
+        """
+        Find all keyword groups present in the text in a single pass.
+        
+        Args:
+            text_lower: Lowercased text to scan
+            
+        Returns:
+            Bitmask of matched groups (SYMPTOMS_BIT, TREATMENT_BIT,
+            PREVENTION_BIT and the species bits in tag_bits)
+        """
+        mask = 0
+        for _, bits in self.keyword_automaton.iter(text_lower):
+            mask |= bits
+        return mask
+
+    def generate_qa(self, text: str, mask: int) -> List[Dict]:
         """
         Generate relevant Q&A pairs based on content analysis.
         
         Args:
             text: Processed text chunk
+            mask: Bitmask of keyword groups found in the text
             
         Returns:
             List of Q&A pairs
         """
         qa_pairs = []
-        text_lower = text.lower()
         
         # Generate symptom-related questions
-        if any(keyword in text_lower for keyword in self.symptoms_keywords):
+        if mask & SYMPTOMS_BIT:
             qa_pairs.append({
                 "question": "What are the symptoms or signs that might indicate this condition?",
                 "answer": text
             })
         
         # Generate treatment-related questions
-        if any(keyword in text_lower for keyword in self.treatment_keywords):
+        if mask & TREATMENT_BIT:
             qa_pairs.append({
                 "question": "What are the recommended treatment approaches or management strategies?",
                 "answer": text
             })
         
         # Generate prevention-related questions
-        if 'prevent' in text_lower or 'prevention' in text_lower:
+        if mask & PREVENTION_BIT:
             qa_pairs.append({
                 "question": "What preventive measures or precautions should be taken?",
                 "answer": text
@@ -190,60 +518,68 @@ class VetDataExtractor:
         
         return qa_pairs
 
-    def extract_tags(self, text: str) -> List[str]:
+    def determine_context(self, text: str, mask: int) -> str:
+        """
+        Determine the primary clinical context of a chunk.
+        
+        Args:
+            text: Text to analyze
+            mask: Bitmask of keyword groups found in the text
+            
+        Returns:
+            Context label as string
+        """
+        # Treatment content takes precedence, then symptoms, then prevention
+        if mask & TREATMENT_BIT:
+            return "treatment"
+        elif mask & SYMPTOMS_BIT:
+            return "diagnosis"
+        elif mask & PREVENTION_BIT:
+            return "prevention"
+        return "general"
+
+    def extract_tags(self, text: str, mask: int) -> List[str]:
         """
         Extract relevant tags including species, conditions, and topics.
         
         Args:
             text: Text to analyze
+            mask: Bitmask of keyword groups found in the text
             
         Returns:
             List of relevant tags
         """
-        tags = set()
-        text_lower = text.lower()
-        
-        # Add species tags
-        for species, keywords in self.species_mapping.items():
-            if any(keyword in text_lower for keyword in keywords):
-                tags.add(species)
-        
-        # Add condition tags
-        if any(keyword in text_lower for keyword in self.symptoms_keywords):
-            tags.add('symptoms')
-        if any(keyword in text_lower for keyword in self.treatment_keywords):
-            tags.add('treatment')
-        
-        return list(tags)
+        # Species and condition tags come straight from the keyword scan
+        return [tag for tag, bit in self.tag_bits.items() if mask & bit]
 
-    def _is_chunk_complete(self, chunk: List[str]) -> bool:
+    def _is_chunk_complete(self, char_count: int, last_sentence: str) -> bool:
         """
         Determine if the current chunk of sentences forms a complete thought.
         
         Args:
-            chunk: List of sentences
+            char_count: Length of the chunk's sentences joined with spaces
+            last_sentence: Most recently added sentence
             
         Returns:
             Boolean indicating if chunk is complete
         """
-        text = ' '.join(chunk)
-        
         # Check if chunk is getting too long
-        if len(text) > 1000:
+        if char_count > 1000:
             return True
             
         # Check for natural breaks in content
-        if text.strip().endswith(('.', '!', '?')):
+        if last_sentence.rstrip().endswith(('.', '!', '?')):
             return True
             
         return False
 
-    def _calculate_confidence(self, text: str) -> str:
+    def _calculate_confidence(self, text: str, mask: int) -> str:
         """
         Calculate confidence score for the extracted information.
         
         Args:
             text: Processed text
+            mask: Bitmask of keyword groups found in the text
             
         Returns:
             Confidence level as string
@@ -251,14 +587,14 @@ class VetDataExtractor:
         # Simple heuristic based on text length and keyword presence
         if len(text) < 100:
             return "low"
-        elif len(text) > 500 and any(keyword in text.lower() for keyword in 
-                                   self.symptoms_keywords | self.treatment_keywords):
+        elif len(text) > 500 and mask & CONFIDENCE_MASK:
             return "high"
         return "medium"
 
 if __name__ == "__main__":
-    # Initialize extractor with logging
-    extractor = VetDataExtractor()
+    # Initialize extractor with logging. Parsing with n_process > 1 spawns
+    # worker processes, which must be started from under this guard.
+    extractor = VetDataExtractor(n_process=max(1, (os.cpu_count() or 1) - 1), batch_size=50)
     
     # Set paths
     pdf_path = "data/raw/vet_book.pdf"
@@ -266,7 +602,7 @@ if __name__ == "__main__":
     
     # Process PDF
     try:
-        processed_data = extractor.process_pdf(pdf_path, output_path)
-        print(f"Successfully processed {len(processed_data)} chunks of information")
+        chunk_count = extractor.process_pdf(pdf_path, output_path)
+        print(f"Successfully processed {chunk_count} chunks of information")
     except Exception as e:
         print(f"Error processing PDF: {str(e)}")
\ No newline at end of file
@@ -1,82 +1,244 @@
-from typing import List, Dict, Optional
+from typing import Iterable, Iterator, List, Dict, Optional
 import json
+import os
 import re
+import tempfile
+import ahocorasick
 from pathlib import Path
 import pandas as pd
 from collections import defaultdict
 
+try:
+    import orjson
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+
+    def _dumps_line(obj) -> bytes:
+        return orjson.dumps(obj)
+
+    def _loads(data: bytes):
+        return orjson.loads(data)
+except ImportError:
+    # Fall back to the stdlib encoder when orjson is not installed
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+
+    def _dumps_line(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+    def _loads(data: bytes):
+        return json.loads(data)
+
 class VetDataProcessor:
+    # Answer keywords that trigger follow-up questions
+    TREATMENT_WORDS = frozenset({'treat', 'medication', 'therapy'})
+    PREVENTION_WORDS = frozenset({'prevent', 'avoid', 'reduce risk'})
+    
+    # Sentence keywords kept when extracting follow-up answers
+    PREVENTION_SENTENCE_WORDS = frozenset({'prevent', 'avoid', 'reduce'})
+    
+    # One bit per metadata tag inspected by the complexity/content type rules
+    TAG_BITS = {
+        tag: 1 << index for index, tag in enumerate(
+            ('emergency', 'critical', 'urgent', 'medical', 'clinical', 'diagnostic', 'behavior'))
+    }
+    
+    # Tags that raise the complexity level of an entry
+    EMERGENCY_MASK = TAG_BITS['emergency'] | TAG_BITS['critical'] | TAG_BITS['urgent']
+    TECHNICAL_MASK = TAG_BITS['medical'] | TAG_BITS['clinical'] | TAG_BITS['diagnostic']
+    
     def __init__(self):
         self.categories = {
-            'diseases': ['symptom', 'disease', 'condition', 'infection'],
-            'behavior': ['behavior', 'training', 'anxiety', 'stress'],
-            'emergency': ['emergency', 'urgent', 'immediate', 'critical'],
-            'preventive': ['prevent', 'vaccination', 'nutrition', 'diet'],
-            'breeds': ['breed', 'purebred', 'mixed breed']
+            'diseases': frozenset({'symptom', 'disease', 'condition', 'infection'}),
+            'behavior': frozenset({'behavior', 'training', 'anxiety', 'stress'}),
+            'emergency': frozenset({'emergency', 'urgent', 'immediate', 'critical'}),
+            'preventive': frozenset({'prevent', 'vaccination', 'nutrition', 'diet'}),
+            'breeds': frozenset({'breed', 'purebred', 'mixed breed'})
         }
         
+        # One automaton over all category keywords; each keyword maps to the
+        # position of the first category that lists it
+        self.category_names = list(self.categories)
+        self.category_automaton = ahocorasick.Automaton()
+        for index in reversed(range(len(self.category_names))):
+            for keyword in self.categories[self.category_names[index]]:
+                self.category_automaton.add_word(keyword, index)
+        self.category_automaton.make_automaton()
+        
+        # Breed and disease patterns, compiled once for extract_breed_info
+        self.breed_patterns = [
+            re.compile(r'in ([A-Z][a-z]+ [A-Z][a-z]+)'),  # For breed names like "German Shepherd"
+            re.compile(r'in ([A-Z][a-z]+)')                # For single word breeds like "Poodle"
+        ]
+        
+        self.disease_patterns = [
+            re.compile(r'([\w\s]+) is (?:more|less) common'),
+            re.compile(r'predisposed to ([\w\s]+)'),
+            re.compile(r'risk of ([\w\s]+)')
+        ]
+        
+        # Fallback sentence splitter for entries without extractor spans
+        self.sentence_pattern = re.compile(r'[^.]+\.?')
+        
     def process_raw_data(self, input_path: str, output_path: str):
         """
         Process raw JSON data into refined training data
         """
         # Load raw data
-        with open(input_path, 'r', encoding='utf-8') as f:
-            raw_data = json.load(f)
+        with open(input_path, 'rb') as f:
+            raw_data = _loads(f.read())
             
         processed_data = []
         
-        for entry in raw_data:
-            # Enhance Q&A pairs
-            enhanced_qa = self.enhance_qa_pairs(entry['qa_pairs'])
+        # Streamed into a temporary file that replaces output_path only once
+        # the array is complete
+        tmp_file = tempfile.NamedTemporaryFile(dir=Path(output_path).parent,
+                                               prefix=Path(output_path).name,
+                                               suffix='.tmp', delete=False)
+        tmp_path = Path(tmp_file.name)
+        try:
+            # Write each entry as soon as it is built rather than dumping the
+            # whole list into one large string at the end
+            with tmp_file as f:
+                f.write(b'[\n')
+            
+                for entry in raw_data:
+                    # Lowercase the source once for every keyword check below
+                    source_text = entry['source_text']
+                    source_lower = source_text.lower()
+                
+                    # Enhance Q&A pairs
+                    enhanced_qa = self.enhance_qa_pairs(entry['qa_pairs'],
+                                                        entry['metadata'].get('sent_spans'),
+                                                        source_text, source_lower)
+                
+                    # Categorize content
+                    category = self.categorize_content(source_text, source_lower)
+                
+                    # Create structured entry
+                    processed_entry = {
+                        'original_text': source_text,
+                        'qa_pairs': enhanced_qa,
+                        'category': category,
+                        'metadata': self.enhance_metadata(entry['metadata'])
+                    }
+                
+                    # On disk each distinct answer is stored once and referenced by index
+                    if processed_data:
+                        f.write(b',\n')
+                    f.write(_dumps({**processed_entry, **self.compact_qa_pairs(enhanced_qa)}))
+                    processed_data.append(processed_entry)
+                
+                f.write(b'\n]\n')
+            os.replace(tmp_path, output_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
             
-            # Categorize content
-            category = self.categorize_content(entry['source_text'])
+        return processed_data
+    
+    def compact_qa_pairs(self, qa_pairs: List[Dict]) -> Dict:
+        """
+        Store each distinct answer once, with Q&A pairs referencing it by index
+        """
+        answers = []
+        answer_index = {}
+        compact = []
+        
+        for qa in qa_pairs:
+            a_idx = answer_index.get(qa['answer'])
+            if a_idx is None:
+                a_idx = answer_index[qa['answer']] = len(answers)
+                answers.append(qa['answer'])
+            compact.append({'question': qa['question'], 'a_idx': a_idx})
             
-            # Create structured entry
-            processed_entry = {
-                'original_text': entry['source_text'],
-                'qa_pairs': enhanced_qa,
-                'category': category,
-                'metadata': self.enhance_metadata(entry['metadata'])
-            }
+        return {'answers': answers, 'qa_pairs': compact}
+    
+    def expand_qa_pairs(self, entry: Dict) -> List[Dict]:
+        """
+        Rebuild full Q&A pairs from an entry written by compact_qa_pairs
+        """
+        if 'answers' not in entry:
+            return entry['qa_pairs']
             
-            processed_data.append(processed_entry)
+        answers = entry['answers']
+        return [{'question': qa['question'], 'answer': answers[qa['a_idx']]}
+                for qa in entry['qa_pairs']]
+    
+    def load_processed_data(self, input_path: str) -> List[Dict]:
+        """
+        Load processed data written by process_raw_data, re-expanding Q&A pairs
+        """
+        with open(input_path, 'rb') as f:
+            processed_data = _loads(f.read())
             
-        # Save processed data
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(processed_data, f, indent=4, ensure_ascii=False)
+        for entry in processed_data:
+            entry['qa_pairs'] = self.expand_qa_pairs(entry)
+            entry.pop('answers', None)
             
         return processed_data
     
-    def enhance_qa_pairs(self, qa_pairs: List[Dict]) -> List[Dict]:
+    def enhance_qa_pairs(self, qa_pairs: List[Dict],
+                         sent_spans: Optional[List[List[int]]] = None,
+                         source_text: Optional[str] = None,
+                         source_lower: Optional[str] = None) -> List[Dict]:
         """
-        Enhance Q&A pairs with additional context and variations
+        Enhance Q&A pairs with additional context and variations.
+        sent_spans and source_lower describe source_text and are reused for
+        answers that repeat the source text verbatim.
         """
         enhanced_pairs = []
+        # Follow-up answers per distinct answer, shared by pairs that repeat it
+        followup_cache = {}
         
         for qa in qa_pairs:
+            # Sentence offsets and lowercase text are only valid for the source text.
+            # Answers repeating it share the source string instead of a loaded copy
+            if source_text is not None and qa['answer'] == source_text:
+                qa = {**qa, 'answer': source_text}
+                answer_spans, answer_lower = sent_spans, source_lower
+            else:
+                answer_spans, answer_lower = None, None
+                
             # Original Q&A
             enhanced_pairs.append(qa)
-            
-            # Generate variations
-            variations = self.generate_question_variations(qa['question'], qa['answer'])
-            enhanced_pairs.extend(variations)
-            
-            # Add follow-up questions if relevant
-            followups = self.generate_followup_questions(qa['question'], qa['answer'])
-            enhanced_pairs.extend(followups)
+                
+            # Add question variations and relevant follow-ups
+            enhanced_pairs.extend(self._expand_qa(qa['question'], qa['answer'],
+                                                  answer_spans, answer_lower,
+                                                  followup_cache))
             
         return enhanced_pairs
     
-    def generate_question_variations(self, question: str, answer: str) -> List[Dict]:
+    def _expand_qa(self, question: str, answer: str,
+                   sent_spans: Optional[List[List[int]]] = None,
+                   answer_lower: Optional[str] = None,
+                   followup_cache: Optional[Dict] = None) -> List[Dict]:
         """
-        Generate variations of the same question
+        Generate question variations and follow-up questions in a single pass,
+        lowercasing the question and answer only once. followup_cache maps an
+        answer to its already extracted follow-up answers.
         """
-        variations = []
+        if followup_cache is not None and answer in followup_cache:
+            treatment_answer, prevention_answer = followup_cache[answer]
+        else:
+            if answer_lower is None:
+                answer_lower = answer.lower()
+                
+            treatment_answer = prevention_answer = None
+            if any(word in answer_lower for word in self.TREATMENT_WORDS):
+                treatment_answer = self.extract_treatment_info(answer, sent_spans)
+            if any(word in answer_lower for word in self.PREVENTION_WORDS):
+                prevention_answer = self.extract_prevention_info(answer, sent_spans)
+                
+            if followup_cache is not None:
+                followup_cache[answer] = (treatment_answer, prevention_answer)
+        
+        expanded = []
         
         # Example: Convert "What are the symptoms?" to different forms
         if 'symptoms' in question.lower():
-            variations.extend([
+            expanded.extend([
                 {
                     'question': 'What signs should I look out for?',
                     'answer': answer
@@ -87,155 +249,167 @@ class VetDataProcessor:
                 }
             ])
             
-        return variations
-    
-    def generate_followup_questions(self, question: str, answer: str) -> List[Dict]:
-        """
-        Generate relevant follow-up questions based on the answer
-        """
-        followups = []
-        
-        # Check if answer mentions treatments
-        if any(word in answer.lower() for word in ['treat', 'medication', 'therapy']):
-            followups.append({
+        # Follow up on treatments mentioned in the answer
+        if treatment_answer is not None:
+            expanded.append({
                 'question': 'What are the treatment options?',
-                'answer': self.extract_treatment_info(answer)
+                'answer': treatment_answer
             })
             
-        # Check if answer mentions prevention
-        if any(word in answer.lower() for word in ['prevent', 'avoid', 'reduce risk']):
-            followups.append({
+        # Follow up on prevention mentioned in the answer
+        if prevention_answer is not None:
+            expanded.append({
                 'question': 'How can this be prevented?',
-                'answer': self.extract_prevention_info(answer)
+                'answer': prevention_answer
             })
             
-        return followups
+        return expanded
     
-    def categorize_content(self, text: str) -> str:
+    def categorize_content(self, text: str, text_lower: Optional[str] = None) -> str:
         """
         Categorize content based on keywords and context
         """
-        text_lower = text.lower()
+        if text_lower is None:
+            text_lower = text.lower()
+            
+        # Earlier categories take precedence, so keep the lowest matched index
+        best = min((index for _, index in self.category_automaton.iter(text_lower)),
+                   default=None)
         
-        for category, keywords in self.categories.items():
-            if any(keyword in text_lower for keyword in keywords):
-                return category
-                
-        return 'general'
+        return self.category_names[best] if best is not None else 'general'
     
     def enhance_metadata(self, metadata: Dict) -> Dict:
         """
         Enhance metadata with additional useful information
         """
         enhanced = metadata.copy()
+        # Sentence offsets are only consumed by process_raw_data, not training metadata
+        enhanced.pop('sent_spans', None)
+        tag_mask = self.tag_mask(metadata.get('tags', []))
         
         # Add complexity level
-        enhanced['complexity'] = self.determine_complexity(metadata.get('tags', []))
+        enhanced['complexity'] = self.determine_complexity(tag_mask)
         
         # Add content type
-        enhanced['content_type'] = self.determine_content_type(metadata.get('tags', []))
+        enhanced['content_type'] = self.determine_content_type(tag_mask)
         
         return enhanced
     
-    def determine_complexity(self, tags: List[str]) -> str:
+    def tag_mask(self, tags: Iterable[str]) -> int:
         """
-        Determine content complexity based on tags
+        Encode the tags relevant to complexity and content type as a bitmask
         """
-        emergency_keywords = {'emergency', 'critical', 'urgent'}
-        technical_keywords = {'medical', 'clinical', 'diagnostic'}
-        
-        if any(tag in emergency_keywords for tag in tags):
+        mask = 0
+        for tag in tags:
+            mask |= self.TAG_BITS.get(tag, 0)
+        return mask
+    
+    def determine_complexity(self, tag_mask: int) -> str:
+        """
+        Determine content complexity based on a tag bitmask
+        """
+        if tag_mask & self.EMERGENCY_MASK:
             return 'high'
-        elif any(tag in technical_keywords for tag in tags):
+        elif tag_mask & self.TECHNICAL_MASK:
             return 'medium'
         return 'basic'
     
-    def determine_content_type(self, tags: List[str]) -> str:
+    def determine_content_type(self, tag_mask: int) -> str:
         """
-        Determine type of content based on tags
+        Determine type of content based on a tag bitmask
         """
-        if 'emergency' in tags:
+        if tag_mask & self.TAG_BITS['emergency']:
             return 'emergency'
-        elif 'medical' in tags:
+        elif tag_mask & self.TAG_BITS['medical']:
             return 'medical'
-        elif 'behavior' in tags:
+        elif tag_mask & self.TAG_BITS['behavior']:
             return 'behavioral'
         return 'general'
     
-    def extract_treatment_info(self, text: str) -> str:
+    def sentence_spans(self, text: str) -> List[List[int]]:
+        """
+        Approximate sentence offsets for text that has no recorded spans
+        """
+        return [list(match.span()) for match in self.sentence_pattern.finditer(text)]
+    
+    def extract_treatment_info(self, text: str,
+                               sent_spans: Optional[List[List[int]]] = None) -> str:
         """
         Extract treatment-related information from text
         """
+        if sent_spans is None:
+            sent_spans = self.sentence_spans(text)
+            
         # Find sentences containing treatment information
-        sentences = text.split('.')
-        treatment_sentences = [s for s in sentences if any(word in s.lower() 
-                             for word in ['treat', 'medication', 'therapy'])]
+        kept = [(a, b) for a, b in sent_spans if any(word in text[a:b].lower()
+                for word in self.TREATMENT_WORDS)]
         
-        return '. '.join(treatment_sentences) + '.' if treatment_sentences else ''
+        return ' '.join(text[a:b].strip() for a, b in kept)
     
-    def extract_prevention_info(self, text: str) -> str:
+    def extract_prevention_info(self, text: str,
+                                sent_spans: Optional[List[List[int]]] = None) -> str:
         """
         Extract prevention-related information from text
         """
-        sentences = text.split('.')
-        prevention_sentences = [s for s in sentences if any(word in s.lower() 
-                              for word in ['prevent', 'avoid', 'reduce'])]
+        if sent_spans is None:
+            sent_spans = self.sentence_spans(text)
+            
+        kept = [(a, b) for a, b in sent_spans if any(word in text[a:b].lower()
+                for word in self.PREVENTION_SENTENCE_WORDS)]
         
-        return '. '.join(prevention_sentences) + '.' if prevention_sentences else ''
+        return ' '.join(text[a:b].strip() for a, b in kept)
 
-    def generate_training_data(self, processed_data: List[Dict], output_path: str):
+    def _iter_training(self, processed_data: List[Dict]) -> Iterator[Dict]:
         """
-        Generate final training data format
+        Yield training examples one at a time
         """
-        training_data = []
-        
         for entry in processed_data:
             for qa in entry['qa_pairs']:
-                training_example = {
+                yield {
                     'input': qa['question'],
                     'output': qa['answer'],
                     'category': entry['category'],
                     'metadata': entry['metadata']
                 }
-                training_data.append(training_example)
-                
-        # Save training data
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(training_data, f, indent=4, ensure_ascii=False)
-            
-        return training_data
     
-    def categorize_content(self, text: str) -> Dict:
-    categories = {
-        'breed': [],
-        'diseases': [],
-        'predisposition_level': None
-    }
+    def generate_training_data(self, processed_data: List[Dict], output_path: str) -> int:
+        """
+        Generate final training data format, streamed to output_path as
+        JSON Lines (one example per line). Returns the number of examples.
+        """
+        count = 0
+        
+        with open(output_path, 'wb') as f:
+            for training_example in self._iter_training(processed_data):
+                f.write(_dumps_line(training_example))
+                f.write(b'\n')
+                count += 1
+            
+        return count
     
-    # Extract breed information
-    breed_patterns = [
-        r'in ([A-Z][a-z]+ [A-Z][a-z]+)',  # For breed names like "German Shepherd"
-        r'in ([A-Z][a-z]+)'                # For single word breeds like "Poodle"
-    ]
-    
-    for pattern in breed_patterns:
-        matches = re.findall(pattern, text)
-        if matches:
-            categories['breed'].extend(matches)
-    
-    # Extract disease information
-    disease_patterns = [
-        r'([\w\s]+) is (?:more|less) common',
-        r'predisposed to ([\w\s]+)',
-        r'risk of ([\w\s]+)'
-    ]
-    
-    for pattern in disease_patterns:
-        matches = re.findall(pattern, text)
-        if matches:
-            categories['diseases'].extend(matches)
-    
-    return categories
+    def extract_breed_info(self, text: str) -> Dict:
+        """
+        Extract breed and breed-predisposed disease mentions from text
+        """
+        categories = {
+            'breed': [],
+            'diseases': [],
+            'predisposition_level': None
+        }
+        
+        # Extract breed information
+        for pattern in self.breed_patterns:
+            matches = pattern.findall(text)
+            if matches:
+                categories['breed'].extend(matches)
+        
+        # Extract disease information
+        for pattern in self.disease_patterns:
+            matches = pattern.findall(text)
+            if matches:
+                categories['diseases'].extend(matches)
+        
+        return categories
 
 # Usage example
 if __name__ == "__main__":
@@ -244,12 +418,12 @@ if __name__ == "__main__":
     # Process raw data
     raw_data_path = "data/processed/raw_data.json"
     processed_data_path = "data/processed/processed_data.json"
-    training_data_path = "data/processed/training_data.json"
+    training_data_path = "data/processed/training_data.jsonl"
     
     # Process the data
     processed_data = processor.process_raw_data(raw_data_path, processed_data_path)
     
     # Generate training data
-    training_data = processor.generate_training_data(processed_data, training_data_path)
+    example_count = processor.generate_training_data(processed_data, training_data_path)
     
-    print(f"Generated {len(training_data)} training examples")
\ No newline at end of file
+    print(f"Generated {example_count} training examples")
\ No newline at end of file
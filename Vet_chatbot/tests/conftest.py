@@ -0,0 +1,37 @@
+import ctypes
+import sys
+from pathlib import Path
+
+import pytest
+
+# The modules in src are run as plain scripts, so import them the same way
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+
+@pytest.fixture
+def make_pdf(tmp_path):
+    """Return a factory writing a PDF with one text page per string."""
+    pdfium = pytest.importorskip("pypdfium2")
+    pdfium_c = pytest.importorskip("pypdfium2.raw")
+
+    def factory(page_texts, name="sample.pdf"):
+        pdf = pdfium.PdfDocument.new()
+        for text in page_texts:
+            page = pdf.new_page(612, 792)
+            y = 750
+            for start in range(0, len(text), 80):
+                obj = pdfium_c.FPDFPageObj_NewTextObj(pdf.raw, b"Helvetica", 10)
+                buffer = ctypes.create_string_buffer((text[start:start + 80] + "\0").encode("utf-16-le"))
+                pdfium_c.FPDFText_SetText(obj, ctypes.cast(buffer, ctypes.POINTER(pdfium_c.FPDF_WCHAR)))
+                pdfium_c.FPDFPageObj_Transform(obj, 1, 0, 0, 1, 40, y)
+                pdfium_c.FPDFPage_InsertObject(page.raw, obj)
+                y -= 14
+            pdfium_c.FPDFPage_GenerateContent(page.raw)
+            page.close()
+
+        path = tmp_path / name
+        pdf.save(str(path))
+        pdf.close()
+        return path
+
+    return factory
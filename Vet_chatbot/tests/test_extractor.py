@@ -0,0 +1,187 @@
+import json
+
+import pytest
+
+pytest.importorskip("spacy")
+pytest.importorskip("ahocorasick")
+
+from extractor import VetDataExtractor
+
+
+SENTENCES = [
+    "The dog showed clinical signs of itching and hair loss.",
+    "Owners often notice the problem in spring",
+    "Treatment with topical medication usually resolves it!",
+    "Regular grooming helps prevent recurrence in dogs.",
+    "Kittens are handled in the same way as adult cats?",
+    "Page 12",
+]
+
+
+@pytest.fixture(scope="module")
+def extractor():
+    return VetDataExtractor()
+
+
+def legacy_generate_qa(extractor, text):
+    """Question list produced by the substring checks before the keyword automaton."""
+    text_lower = text.lower()
+    questions = []
+    if any(keyword in text_lower for keyword in extractor.symptoms_keywords):
+        questions.append("What are the symptoms or signs that might indicate this condition?")
+    if any(keyword in text_lower for keyword in extractor.treatment_keywords):
+        questions.append("What are the recommended treatment approaches or management strategies?")
+    if 'prevent' in text_lower or 'prevention' in text_lower:
+        questions.append("What preventive measures or precautions should be taken?")
+    return questions
+
+
+@pytest.mark.parametrize("sentences", [
+    SENTENCES[:1],
+    SENTENCES[1:2],
+    SENTENCES[2:4],
+    SENTENCES[4:5],
+    ["Owners often notice the problem in spring", "and it usually fades by autumn"],
+    ["Short text.", "Tiny."],
+    SENTENCES,
+])
+def test_early_reject_matches_legacy_generate_qa(extractor, sentences):
+    text = " ".join(sentences)
+    expected = legacy_generate_qa(extractor, text) if len(text) >= 50 else []
+
+    chunk = extractor.create_qa_pair(sentences)
+
+    if not expected:
+        assert chunk is None
+    else:
+        assert [qa["question"] for qa in chunk["qa_pairs"]] == expected
+        assert all(qa["answer"] == text for qa in chunk["qa_pairs"])
+
+
+SEMICOLON_LIST = ("Common signs in dogs include fever; cough; lethargy; and weight loss, "
+                  "so treatment should start early with supportive therapy.")
+
+# A list-heavy page: many words, semicolons but no sentence-ending marks
+IRREGULAR_PAGE = "; ".join(["vomiting", "diarrhoea", "anorexia", "fever", "cough"] * 30)
+REGULAR_PAGE = " ".join(SENTENCES[:5]) * 5
+
+
+def test_semicolon_list_items_survive_into_source_text(extractor):
+    chunks = extractor.process_text(SEMICOLON_LIST)
+
+    source_words = " ".join(chunk["source_text"] for chunk in chunks).split()
+    assert source_words == SEMICOLON_LIST.split()
+
+
+def test_semicolon_lists_count_as_irregular(extractor):
+    assert extractor._is_irregular(IRREGULAR_PAGE)
+    assert not extractor._is_irregular(REGULAR_PAGE)
+
+
+def test_select_nlp_keeps_sentencizer_for_regular_pages(extractor):
+    assert extractor._select_nlp([REGULAR_PAGE, REGULAR_PAGE]) is extractor.nlp
+
+
+def test_select_nlp_uses_parser_for_irregular_documents(extractor, monkeypatch):
+    import extractor as extractor_module
+
+    parser = object()
+    monkeypatch.setattr(extractor_module, "_load_nlp",
+                        lambda model_name, use_parser: parser if use_parser else extractor.nlp)
+
+    assert extractor._select_nlp([IRREGULAR_PAGE, REGULAR_PAGE]) is parser
+
+
+def test_select_nlp_falls_back_to_sentencizer_without_parser_model(extractor, monkeypatch):
+    import extractor as extractor_module
+
+    def missing_model(model_name, use_parser):
+        raise OSError("[E050] Can't find model")
+
+    monkeypatch.setattr(extractor_module, "_load_nlp", missing_model)
+
+    assert extractor._select_nlp([IRREGULAR_PAGE]) is extractor.nlp
+
+
+PLAIN_PAGE = ("Owners often bring their pets to the clinic early in the morning. "
+              "The waiting room is quiet and the staff greet everyone by name. ") * 2
+
+
+def test_process_pdf_writes_valid_json_for_zero_chunks(extractor, make_pdf, tmp_path):
+    output_path = tmp_path / "out" / "processed.json"
+
+    chunk_count = extractor.process_pdf(str(make_pdf([PLAIN_PAGE])), str(output_path))
+
+    assert chunk_count == 0
+    assert json.loads(output_path.read_text()) == []
+    assert list(output_path.parent.iterdir()) == [output_path]
+
+
+def test_process_pdf_output_named_tmp_is_kept(extractor, make_pdf, tmp_path):
+    output_path = tmp_path / "processed.tmp"
+    sibling = tmp_path / "processed.json.tmp"
+    sibling.write_text("unrelated")
+
+    chunk_count = extractor.process_pdf(str(make_pdf([REGULAR_PAGE])), str(output_path))
+
+    assert chunk_count > 0
+    assert len(json.loads(output_path.read_text())) == chunk_count
+    assert sibling.read_text() == "unrelated"
+
+
+def test_pdfium_page_failure_falls_back_to_pypdf2(extractor, make_pdf, monkeypatch):
+    import pypdfium2 as pdfium
+
+    pdf_path = make_pdf([REGULAR_PAGE, PLAIN_PAGE, REGULAR_PAGE])
+    original_get_textpage = pdfium.PdfPage.get_textpage
+    opened = []
+    calls = []
+
+    def flaky_get_textpage(page):
+        calls.append(page)
+        if len(calls) == 2:
+            raise RuntimeError("broken page")
+        textpage = original_get_textpage(page)
+        opened.append(textpage)
+        return textpage
+
+    monkeypatch.setattr(pdfium.PdfPage, "get_textpage", flaky_get_textpage)
+
+    page_texts = extractor._extract_page_texts(str(pdf_path))
+
+    assert len(page_texts) == 3
+    assert "waiting room" in page_texts[1]
+    assert "itching" in page_texts[0] and "itching" in page_texts[2]
+    assert all(textpage.raw is None for textpage in opened)
+
+
+def test_sent_spans_slice_back_to_sentences(extractor):
+    sentences = SENTENCES[:4]
+
+    chunk = extractor.create_qa_pair(sentences)
+
+    text = chunk["source_text"]
+    assert [text[start:end] for start, end in chunk["metadata"]["sent_spans"]] == sentences
+
+
+def test_char_count_matches_joined_chunk(extractor, monkeypatch):
+    doc = extractor.nlp(" ".join(SENTENCES))
+    original = extractor._is_chunk_complete
+    chunk = []
+    checked = []
+
+    def spy(char_count, last_sentence):
+        chunk.append(last_sentence)
+        checked.append((char_count, len(" ".join(chunk))))
+        complete = original(char_count, last_sentence)
+        if complete:
+            chunk.clear()
+        return complete
+
+    monkeypatch.setattr(extractor, "_is_chunk_complete", spy)
+    extractor._process_doc(doc)
+
+    # The unterminated second sentence makes at least one multi-sentence chunk
+    assert any(joined > len(sentence) for (_, joined), sentence in zip(checked, SENTENCES))
+    for char_count, joined_length in checked:
+        assert char_count == joined_length
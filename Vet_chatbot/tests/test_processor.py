@@ -0,0 +1,104 @@
+import json
+
+import pytest
+
+pytest.importorskip("ahocorasick")
+pytest.importorskip("pandas")
+
+from processor import VetDataProcessor
+
+
+@pytest.fixture(scope="module")
+def processor():
+    return VetDataProcessor()
+
+
+def test_process_raw_data_writes_valid_json_for_zero_entries(processor, tmp_path):
+    input_path = tmp_path / "raw.json"
+    input_path.write_text("[]")
+    output_path = tmp_path / "processed.json"
+    sibling = tmp_path / "processed.tmp"
+    sibling.write_text("unrelated")
+
+    assert processor.process_raw_data(str(input_path), str(output_path)) == []
+    assert json.loads(output_path.read_text()) == []
+    assert sibling.read_text() == "unrelated"
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "processed.json", "processed.tmp", "raw.json"]
+
+
+def legacy_categorize(processor, text):
+    """Category chosen by the ordered substring scan before the keyword automaton."""
+    text_lower = text.lower()
+    for category, keywords in processor.categories.items():
+        if any(keyword in text_lower for keyword in keywords):
+            return category
+    return 'general'
+
+
+@pytest.mark.parametrize("text", [
+    "Vaccination schedules for puppies.",
+    "An urgent infection needs immediate care.",
+    "Mixed breed dogs under stress during training.",
+    "A purebred cat on a special diet.",
+    "CRITICAL: the Condition worsened.",
+    "Grooming tips for long-haired rabbits.",
+    "",
+])
+def test_categorize_content_matches_ordered_scan(processor, text):
+    assert processor.categorize_content(text) == legacy_categorize(processor, text)
+
+
+DOSAGE_TEXT = "Give 2.5 mg of medication twice daily. Walks help. Avoid cold floors."
+DOSAGE_SPANS = [[0, 38], [39, 50], [51, 69]]
+
+
+def test_followups_use_extractor_sentence_spans(processor):
+    assert processor.extract_treatment_info(DOSAGE_TEXT, DOSAGE_SPANS) == \
+        "Give 2.5 mg of medication twice daily."
+    assert processor.extract_prevention_info(DOSAGE_TEXT, DOSAGE_SPANS) == "Avoid cold floors."
+
+
+def test_enhance_qa_pairs_applies_spans_only_to_source_answers(processor):
+    qa_pairs = [
+        {'question': 'What are the treatment options?', 'answer': DOSAGE_TEXT},
+        {'question': 'Anything else?', 'answer': 'Other medication exists. Ask a vet.'},
+    ]
+
+    enhanced = processor.enhance_qa_pairs(qa_pairs, DOSAGE_SPANS, DOSAGE_TEXT, DOSAGE_TEXT.lower())
+
+    followups = [qa['answer'] for qa in enhanced if qa['question'] == 'What are the treatment options?']
+    assert followups == [DOSAGE_TEXT, "Give 2.5 mg of medication twice daily.",
+                         "Other medication exists."]
+
+
+def test_compact_qa_pairs_round_trip(processor):
+    source = "Treatment with medication helps. Vaccination can prevent infection."
+    qa_pairs = [
+        {'question': 'What are the treatment options?', 'answer': source},
+        {'question': 'What signs should I look out for?', 'answer': source},
+        {'question': 'How can this be prevented?', 'answer': 'Vaccination can prevent infection.'},
+        {'question': 'What are the treatment options?', 'answer': source},
+    ]
+
+    compact = processor.compact_qa_pairs(qa_pairs)
+
+    assert compact['answers'] == [source, 'Vaccination can prevent infection.']
+    assert [qa['a_idx'] for qa in compact['qa_pairs']] == [0, 0, 1, 0]
+    assert processor.expand_qa_pairs({'original_text': source, **compact}) == qa_pairs
+
+
+def test_load_processed_data_expands_written_answers(processor, tmp_path):
+    raw_data = [{
+        'source_text': DOSAGE_TEXT,
+        'qa_pairs': [{'question': 'What are the symptoms?', 'answer': DOSAGE_TEXT}],
+        'metadata': {'tags': ['dog'], 'sent_spans': DOSAGE_SPANS},
+    }]
+    input_path = tmp_path / "raw.json"
+    input_path.write_text(json.dumps(raw_data))
+    output_path = tmp_path / "processed.json"
+
+    processed_data = processor.process_raw_data(str(input_path), str(output_path))
+
+    assert 'answers' in json.loads(output_path.read_text())[0]
+    assert processor.load_processed_data(str(output_path)) == processed_data